@@ -0,0 +1,273 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+from database import utils
+
+logger = logging.getLogger(__name__)
+
+# Scheduling
+POLL_INTERVAL_SECONDS = 30            # How often the background thread wakes up
+MAINTENANCE_INTERVAL_SECONDS = 3600   # Run at least this often
+WRITE_THRESHOLD = 1000                # ...or as soon as this many rows were written since the last run
+INTEGRITY_CHECK_INTERVAL_SECONDS = 24 * 3600
+STATS_LOG_INTERVAL_SECONDS = 3600     # How often the scheduler logs a summary of the counters below
+
+# Load and time limits
+PEAK_WRITES_PER_POLL = 100            # More writes than this in one poll window means "peak", so we defer
+TIME_BUDGET_SECONDS = 5.0             # Total wall-clock budget for one maintenance run
+INCREMENTAL_VACUUM_PAGES = 500        # Free pages reclaimed per run
+VACUUM_CONVERSION_BUDGET_SECONDS = TIME_BUDGET_SECONDS  # Cap for the one-off auto_vacuum conversion, within the run budget
+MAX_VACUUM_CONVERSION_ATTEMPTS = 3    # Interrupted conversions before the scheduler stops retrying
+ANALYSIS_LIMIT = 400                  # Rows sampled per index by scheduled ANALYZE runs (0 = no limit)
+BUSY_TIMEOUT_MS = 1000
+
+# In-process counters. Reported by the scheduler's periodic summary log line
+# (log_maintenance_stats) and readable in-process with get_maintenance_stats().
+_stats: Dict[str, Any] = {
+    "runs": 0,
+    "skipped_peak_load": 0,
+    "failures": 0,
+    "last_run_at": None,
+    "last_duration_seconds": None,
+    "last_trigger": None,
+    "last_tasks": {},
+    "last_integrity_check_at": None,
+    "last_integrity_ok": None,
+}
+_stats_lock = threading.Lock()
+# Interrupted auto_vacuum conversions per database path (guarded by _stats_lock)
+_vacuum_conversion_failures: Dict[str, int] = {}
+
+
+class MaintenanceBudgetExceeded(Exception):
+    pass
+
+
+def get_maintenance_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+        stats["last_tasks"] = dict(_stats["last_tasks"])
+        return stats
+
+
+def log_maintenance_stats() -> None:
+    stats = get_maintenance_stats()
+    logger.info(
+        "Database maintenance stats: runs=%d failures=%d skipped_peak_load=%d last_trigger=%s "
+        "last_duration_seconds=%s last_integrity_ok=%s",
+        stats["runs"], stats["failures"], stats["skipped_peak_load"], stats["last_trigger"],
+        None if stats["last_duration_seconds"] is None else round(stats["last_duration_seconds"], 3),
+        stats["last_integrity_ok"],
+    )
+
+
+def _open_connection(database_url: Optional[str]) -> sqlite3.Connection:
+    # isolation_level=None: VACUUM-style pragmas and checkpoints must run outside a transaction
+    conn = sqlite3.connect(database_url or utils.DATABASE_URL, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _run_task(conn: sqlite3.Connection, sql: str, deadline: float, fetch: bool = False):
+    if time.monotonic() >= deadline:
+        raise MaintenanceBudgetExceeded(sql)
+    # The progress handler aborts a long-running statement once the budget is spent
+    conn.set_progress_handler(lambda: 1 if time.monotonic() >= deadline else 0, 1000)
+    try:
+        if fetch:
+            return conn.execute(sql).fetchall()
+        # executescript steps the statement to completion; a single execute() would make
+        # incremental_vacuum free only one page
+        conn.executescript(sql)
+        return []
+    except sqlite3.OperationalError as e:
+        if time.monotonic() >= deadline and "interrupted" in str(e):
+            raise MaintenanceBudgetExceeded(sql) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def run_maintenance(database_url: Optional[str] = None, full_analyze: bool = False,
+                    check_integrity: bool = False, time_budget: float = TIME_BUDGET_SECONDS,
+                    trigger: str = "manual") -> Dict[str, Any]:
+    """
+    Runs one maintenance pass (ANALYZE, WAL checkpoint, incremental_vacuum and optionally
+    quick_check) against the database, stopping once time_budget is spent. ANALYZE samples
+    ANALYSIS_LIMIT rows per index unless full_analyze is set.
+    Returns a report of per-task durations and outcomes.
+    """
+    report: Dict[str, Any] = {"trigger": trigger, "tasks": {}, "ok": True}
+    started = time.monotonic()
+    deadline = started + time_budget
+    database_path = database_url or utils.DATABASE_URL
+    conn = _open_connection(database_path)
+    try:
+        # PRAGMA optimize is not used: before SQLite 3.46 it only analyzes tables that queries on
+        # the same connection flagged, so on this fresh connection it never refreshes sqlite_stat1.
+        # A sampled ANALYZE keeps planner statistics current every run at a bounded cost.
+        analysis_limit = 0 if full_analyze else ANALYSIS_LIMIT
+        tasks = [("analyze", f"PRAGMA analysis_limit = {analysis_limit}; ANALYZE")]
+        tasks.append(("wal_checkpoint", "PRAGMA wal_checkpoint(TRUNCATE)"))
+        needs_conversion = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+        if not needs_conversion:
+            tasks.append(("incremental_vacuum", f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})"))
+        if check_integrity:
+            tasks.append(("integrity_check", "PRAGMA quick_check"))
+        with _stats_lock:
+            conversion_failures = _vacuum_conversion_failures.get(database_path, 0)
+        if needs_conversion and conversion_failures < MAX_VACUUM_CONVERSION_ATTEMPTS:
+            # Files created before auto_vacuum=INCREMENTAL need a one-off VACUUM to switch modes.
+            # It rewrites the whole file, so it runs last (an interrupted attempt must not starve
+            # the integrity check) under its own capped budget, and is abandoned after
+            # MAX_VACUUM_CONVERSION_ATTEMPTS interruptions.
+            tasks.append(("enable_incremental_vacuum", "PRAGMA auto_vacuum = INCREMENTAL; VACUUM"))
+
+        for name, sql in tasks:
+            task_started = time.monotonic()
+            task_deadline = deadline
+            if name == "enable_incremental_vacuum":
+                task_deadline = min(deadline, task_started + VACUUM_CONVERSION_BUDGET_SECONDS)
+            try:
+                rows = _run_task(conn, sql, task_deadline, fetch=name == "integrity_check")
+            except MaintenanceBudgetExceeded:
+                report["tasks"][name] = {"status": "skipped_budget"}
+                report["ok"] = False
+                logger.warning("Maintenance budget exhausted before/while running %s", name)
+                if name == "enable_incremental_vacuum":
+                    _record_conversion_failure(database_path)
+                continue
+            except sqlite3.Error as e:
+                report["tasks"][name] = {"status": "error", "error": str(e)}
+                report["ok"] = False
+                logger.error("Maintenance task %s failed: %s", name, e)
+                continue
+            result: Dict[str, Any] = {"status": "ok", "duration_seconds": time.monotonic() - task_started}
+            if name == "enable_incremental_vacuum":
+                with _stats_lock:
+                    _vacuum_conversion_failures.pop(database_path, None)
+                logger.info("Switched database to auto_vacuum=INCREMENTAL in %.3fs", result["duration_seconds"])
+            if name == "integrity_check":
+                result["integrity_ok"] = rows == [("ok",)]
+                if not result["integrity_ok"]:
+                    report["ok"] = False
+                    logger.error("Integrity check reported problems: %s", rows[:10])
+            report["tasks"][name] = result
+    finally:
+        conn.close()
+
+    report["duration_seconds"] = time.monotonic() - started
+    _record_run(report)
+    logger.info("Database maintenance (%s) finished in %.3fs: %s",
+                trigger, report["duration_seconds"],
+                {name: task["status"] for name, task in report["tasks"].items()})
+    return report
+
+
+def _record_conversion_failure(database_path: str) -> None:
+    with _stats_lock:
+        failures = _vacuum_conversion_failures.get(database_path, 0) + 1
+        _vacuum_conversion_failures[database_path] = failures
+    if failures == MAX_VACUUM_CONVERSION_ATTEMPTS:
+        logger.warning(
+            "Giving up on switching %s to auto_vacuum=INCREMENTAL after %d interrupted VACUUM attempts; "
+            "incremental_vacuum stays disabled until it is converted manually "
+            "(see README: 'PRAGMA auto_vacuum = INCREMENTAL; VACUUM;' during a quiet period)",
+            database_path, failures,
+        )
+
+
+def _record_run(report: Dict[str, Any]) -> None:
+    with _stats_lock:
+        _stats["runs"] += 1
+        if not report["ok"]:
+            _stats["failures"] += 1
+        _stats["last_run_at"] = time.time()
+        _stats["last_duration_seconds"] = report["duration_seconds"]
+        _stats["last_trigger"] = report["trigger"]
+        _stats["last_tasks"] = report["tasks"]
+        integrity = report["tasks"].get("integrity_check")
+        if integrity and integrity["status"] == "ok":
+            _stats["last_integrity_check_at"] = _stats["last_run_at"]
+            _stats["last_integrity_ok"] = integrity["integrity_ok"]
+
+
+class MaintenanceScheduler:
+    """
+    Background thread that runs run_maintenance() on a schedule or once WRITE_THRESHOLD
+    rows were written, deferring while the write rate indicates peak load.
+    """
+
+    def __init__(self, database_url: Optional[str] = None, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.database_url = database_url
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_run = time.monotonic()
+        self._last_integrity_check: Optional[float] = None
+        self._writes_at_last_run = utils.get_write_count()
+        self._writes_at_last_poll = self._writes_at_last_run
+        self._last_stats_log = time.monotonic()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="db-maintenance", daemon=True)
+        self._thread.start()
+        logger.info("Database maintenance scheduler started")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=TIME_BUDGET_SECONDS + self.poll_interval)
+            self._thread = None
+        logger.info("Database maintenance scheduler stopped")
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Database maintenance run failed")
+
+    def tick(self) -> Optional[Dict[str, Any]]:
+        """Checks the triggers once and runs maintenance if one fired. Returns the run report, if any."""
+        now = time.monotonic()
+        if now - self._last_stats_log >= STATS_LOG_INTERVAL_SECONDS:
+            log_maintenance_stats()
+            self._last_stats_log = now
+
+        writes = utils.get_write_count()
+        recent_writes = writes - self._writes_at_last_poll
+        self._writes_at_last_poll = writes
+
+        write_threshold_hit = writes - self._writes_at_last_run >= WRITE_THRESHOLD
+        if write_threshold_hit:
+            trigger = "write_threshold"
+        elif now - self._last_run >= MAINTENANCE_INTERVAL_SECONDS:
+            trigger = "schedule"
+        else:
+            return None
+
+        if recent_writes > PEAK_WRITES_PER_POLL:
+            with _stats_lock:
+                _stats["skipped_peak_load"] += 1
+            logger.info("Deferring database maintenance (%s): %d writes in the last poll window", trigger, recent_writes)
+            return None
+
+        check_integrity = (self._last_integrity_check is None
+                           or now - self._last_integrity_check >= INTEGRITY_CHECK_INTERVAL_SECONDS)
+        report = run_maintenance(self.database_url, full_analyze=write_threshold_hit,
+                                 check_integrity=check_integrity, trigger=trigger)
+        self._last_run = time.monotonic()
+        self._writes_at_last_run = writes
+        if report["tasks"].get("integrity_check", {}).get("status") == "ok":
+            self._last_integrity_check = self._last_run
+        return report
+
+
+scheduler = MaintenanceScheduler()
@@ -0,0 +1,100 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Tables that are expected to grow large; a full SCAN of one of these is a regression
+# unless the approved plan explicitly allows it.
+LARGE_TABLES = {"posts", "users"}
+
+# Opt-in at runtime with QUERY_PLAN_DEBUG=1, or programmatically with enable_capture()
+_capture_enabled = os.environ.get("QUERY_PLAN_DEBUG") == "1"
+_captured: Dict[str, List[str]] = {}
+_captured_lock = threading.Lock()
+
+_PLANNED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def enable_capture() -> None:
+    global _capture_enabled
+    _capture_enabled = True
+
+
+def disable_capture() -> None:
+    global _capture_enabled
+    _capture_enabled = False
+
+
+def is_capture_enabled() -> bool:
+    return _capture_enabled
+
+
+def get_captured_plans() -> Dict[str, List[str]]:
+    """Returns {normalized SQL: plan lines} for every statement seen since the last clear."""
+    with _captured_lock:
+        return {sql: list(plan) for sql, plan in _captured.items()}
+
+
+def clear_captured_plans() -> None:
+    with _captured_lock:
+        _captured.clear()
+
+
+def normalize_sql(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def normalize_plan_detail(detail: str) -> str:
+    # SQLite < 3.36 prints "SCAN TABLE x"/"SEARCH TABLE x"; newer versions drop "TABLE"
+    return re.sub(r"^(SCAN|SEARCH) TABLE ", r"\1 ", detail)
+
+
+def find_full_scans(plan: Iterable[str], tables: Iterable[str] = LARGE_TABLES) -> List[str]:
+    """Returns the plan lines that scan one of the given tables without an index."""
+    scans = []
+    for line in plan:
+        match = re.match(r"^SCAN (\w+)", line)
+        # "SCAN x USING COVERING INDEX" still reads every row, so it counts as a full scan too
+        if match and match.group(1) in tables:
+            scans.append(line)
+    return scans
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters=()) -> List[str]:
+    rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    return [normalize_plan_detail(row[3]) for row in rows]
+
+
+def _capture(conn: sqlite3.Connection, sql: str, parameters) -> None:
+    if not sql.lstrip().upper().startswith(_PLANNED_STATEMENTS):
+        return
+    plan = explain(conn, sql, parameters)
+    key = normalize_sql(sql)
+    with _captured_lock:
+        _captured[key] = plan
+    scans = find_full_scans(plan)
+    if scans:
+        logger.warning("Full table scan in %r: %s", key, scans)
+    else:
+        logger.debug("Query plan for %r: %s", key, plan)
+
+
+class PlanCapturingCursor(sqlite3.Cursor):
+    """Cursor that records EXPLAIN QUERY PLAN for each statement before executing it."""
+
+    def execute(self, sql, parameters=()):
+        if _capture_enabled:
+            _capture(self.connection, sql, parameters)
+        return super().execute(sql, parameters)
+
+
+class PlanCapturingConnection(sqlite3.Connection):
+    def cursor(self, factory=PlanCapturingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
@@ -1,15 +1,14 @@
 import sqlite3
 
-def create_db_and_tables():
-    conn = sqlite3.connect('posts.db')
+def create_db_and_tables(db_path: str = 'posts.db'):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL
-        )
-    ''')
+    # incremental_vacuum (run by database/maintenance.py) only reclaims pages when
+    # auto_vacuum is INCREMENTAL. The pragma only takes effect on a file without tables;
+    # existing files are converted later by the maintenance scheduler, within its time budget.
+    cursor.execute("SELECT count(*) FROM sqlite_master")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,6 +17,22 @@ def create_db_and_tables():
             is_active BOOLEAN DEFAULT TRUE
         )
     ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            author_id INTEGER REFERENCES users(id)
+        )
+    ''')
+    # Databases created before posts had an owner: add the column. There is no record of who
+    # wrote existing posts, so they keep author_id NULL and remain editable/deletable by any
+    # authenticated user (see update_post/delete_post in database/utils.py).
+    cursor.execute("PRAGMA table_info(posts)")
+    if "author_id" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE posts ADD COLUMN author_id INTEGER REFERENCES users(id)")
+    # Serves ownership-checked writes and the per-user listing (GET /users/me/posts) as index range scans
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_author_id_id ON posts (author_id, id)")
     conn.commit()
     conn.close()
 
@@ -1,29 +1,53 @@
 import sqlite3
+import threading
 from typing import Optional, List, Dict, Any
 from models.user import UserCreate, UserInDB # Added UserCreate and UserInDB
+from database import query_plan
 
 DATABASE_URL = "posts.db"
 
+# Running total of rows written through this module. The maintenance scheduler
+# (database/maintenance.py) samples it to detect write-volume thresholds and peak load.
+_write_count = 0
+_write_count_lock = threading.Lock()
+
+def record_writes(count: int = 1) -> None:
+    global _write_count
+    if count <= 0:
+        return
+    with _write_count_lock:
+        _write_count += count
+
+def get_write_count() -> int:
+    with _write_count_lock:
+        return _write_count
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE_URL)
+    if query_plan.is_capture_enabled():
+        # Debug mode: record EXPLAIN QUERY PLAN for every statement (see database/query_plan.py)
+        conn = sqlite3.connect(DATABASE_URL, factory=query_plan.PlanCapturingConnection)
+    else:
+        conn = sqlite3.connect(DATABASE_URL)
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name
+    conn.execute("PRAGMA foreign_keys = ON")  # Enforce posts.author_id -> users.id
     return conn
 
-def create_post(title: str, content: str) -> int:
+def create_post(title: str, content: str, author_id: int) -> int:
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("INSERT INTO posts (title, content) VALUES (?, ?)", (title, content))
+    cursor.execute("INSERT INTO posts (title, content, author_id) VALUES (?, ?, ?)", (title, content, author_id))
     conn.commit()
     post_id = cursor.lastrowid
     conn.close()
     if post_id is None:
         raise Exception("Failed to create post, lastrowid is None")
+    record_writes()
     return post_id
 
 def get_post(post_id: int) -> Optional[Dict[str, Any]]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, content FROM posts WHERE id = ?", (post_id,))
+    cursor.execute("SELECT id, title, content, author_id FROM posts WHERE id = ?", (post_id,))
     post = cursor.fetchone()
     conn.close()
     if post:
@@ -33,14 +57,35 @@ def get_post(post_id: int) -> Optional[Dict[str, Any]]:
 def get_all_posts() -> List[Dict[str, Any]]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, content FROM posts")
+    cursor.execute("SELECT id, title, content, author_id FROM posts")
     posts = cursor.fetchall()
     conn.close()
     return [dict(post) for post in posts]
 
-def update_post(post_id: int, title: Optional[str] = None, content: Optional[str] = None) -> bool:
+def get_posts_by_author(author_id: int, before_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    # Newest first, keyset-paginated on id: both forms are a range scan of idx_posts_author_id_id
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if before_id is None:
+        cursor.execute(
+            "SELECT id, title, content, author_id FROM posts WHERE author_id = ? ORDER BY id DESC LIMIT ?",
+            (author_id, limit)
+        )
+    else:
+        cursor.execute(
+            "SELECT id, title, content, author_id FROM posts WHERE author_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (author_id, before_id, limit)
+        )
+    posts = cursor.fetchall()
+    conn.close()
+    return [dict(post) for post in posts]
+
+def update_post(post_id: int, author_id: int, title: Optional[str] = None, content: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # Only updates the post if it belongs to author_id or has no owner (posts created before
+    # ownership was tracked). Returns the updated post (via RETURNING, so no second read);
+    # None means "not found or owned by someone else"
     if title is None and content is None:
-        return False  # Nothing to update
+        return None  # Nothing to update
 
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -56,24 +101,33 @@ def update_post(post_id: int, title: Optional[str] = None, content: Optional[str
         params.append(content)
     
     params.append(post_id)
+    params.append(author_id)
     
-    query = f"UPDATE posts SET {', '.join(updates)} WHERE id = ?"
+    query = (
+        f"UPDATE posts SET {', '.join(updates)} WHERE id = ? AND (author_id = ? OR author_id IS NULL) "
+        "RETURNING id, title, content, author_id"
+    )
     
     cursor.execute(query, tuple(params))
+    updated_post = cursor.fetchone()  # RETURNING rows must be fetched before commit
     conn.commit()
-    
-    updated_rows = cursor.rowcount
     conn.close()
     
-    return updated_rows > 0
+    if updated_post:
+        record_writes()
+        return dict(updated_post)
+    return None
 
-def delete_post(post_id: int) -> bool:
+def delete_post(post_id: int, author_id: int) -> bool:
+    # Only deletes the post if it belongs to author_id or has no owner (see update_post);
+    # False means "not found or owned by someone else"
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+    cursor.execute("DELETE FROM posts WHERE id = ? AND (author_id = ? OR author_id IS NULL)", (post_id, author_id))
     conn.commit()
     deleted_rows = cursor.rowcount
     conn.close()
+    record_writes(deleted_rows)
     return deleted_rows > 0
 
 # --- User related database functions ---
@@ -97,6 +151,7 @@ def create_user(user: UserCreate, hashed_password: str) -> Optional[UserInDB]:
             (user.username, hashed_password)
         )
         conn.commit()
+        record_writes()
         # Fetch the user back to get ID and defaults like is_active
         created_user = get_user_by_username(user.username)
         return created_user
@@ -1,30 +1,40 @@
-from fastapi import FastAPI, HTTPException, Depends, status # Added Depends and status
-from typing import List
+from fastapi import FastAPI, HTTPException, Depends, Query, status # Added Depends and status
+from typing import List, Optional
 from datetime import timedelta # Added timedelta
+from contextlib import asynccontextmanager
 
 from fastapi.security import OAuth2PasswordRequestForm # Added OAuth2PasswordRequestForm
 
 # Model imports
-from models.post import PostCreate, PostResponse, PostUpdate
-from models.user import User, UserCreate, Token # Added User, UserCreate, Token
+from models.post import PostCreate, PostResponse, PostUpdate, PostPage
+from models.user import User, UserCreate, UserInDB, Token # Added User, UserCreate, Token
 
 # Database and Auth imports
 from database.utils import ( # Grouped DB utils imports
     create_post, 
     get_all_posts, 
     get_post, 
+    get_posts_by_author,
     update_post, 
     delete_post,
     create_user, # Added create_user
     get_user_by_username # Added get_user_by_username
 )
 from database.setup import create_db_and_tables
+from database.maintenance import scheduler as maintenance_scheduler
 import auth # Added auth module
 
 # Create database and tables
 create_db_and_tables()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background checkpoint/ANALYZE/vacuum/integrity runs for posts.db
+    maintenance_scheduler.start()
+    yield
+    maintenance_scheduler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Placeholder for root endpoint (from initial setup)
 @app.get("/")
@@ -73,11 +83,21 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 # --- CRUD Endpoints for Posts ---
 
+@app.get("/users/me/posts", response_model=PostPage)
+async def read_my_posts(
+    cursor: Optional[int] = Query(None, description="Return posts with an id below this value (next_cursor of the previous page)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserInDB = Depends(auth.get_current_active_user)
+):
+    # Fetch one extra row to know whether another page exists
+    posts = get_posts_by_author(current_user.id, before_id=cursor, limit=limit + 1)
+    next_cursor = posts[limit - 1]["id"] if len(posts) > limit else None
+    return PostPage(items=[PostResponse(**post) for post in posts[:limit]], next_cursor=next_cursor)
+
 @app.post("/posts", response_model=PostResponse, status_code=201)
-async def create_new_post(post: PostCreate, current_user: User = Depends(auth.get_current_active_user)):
-    # Ownership logic is not implemented in this step.
-    # We just ensure the user is authenticated.
-    post_id = create_post(title=post.title, content=post.content)
+async def create_new_post(post: PostCreate, current_user: UserInDB = Depends(auth.get_current_active_user)):
+    # The authenticated user becomes the post's owner
+    post_id = create_post(title=post.title, content=post.content, author_id=current_user.id)
     created_post = get_post(post_id)
     if not created_post:
         # This case should ideally not happen if create_post is successful and returns a valid ID
@@ -99,45 +119,33 @@ async def read_post(post_id: int, current_user: User = Depends(auth.get_current_
     return PostResponse(**post)
 
 @app.put("/posts/{post_id}", response_model=PostResponse)
-async def update_existing_post(post_id: int, post_update: PostUpdate, current_user: User = Depends(auth.get_current_active_user)):
-    # Ownership logic is not implemented in this step.
-    # We just ensure the user is authenticated.
-    existing_post = get_post(post_id)
-    if not existing_post:
-        raise HTTPException(status_code=404, detail="Post not found")
-
-    updated_successfully = update_post(post_id, title=post_update.title, content=post_update.content)
-    
-    if not updated_successfully:
-        # This might indicate an issue with the update process itself, even if the post exists.
-        # Depending on `update_post` behavior, this might be redundant if it already raises an error
-        # or if `get_post` below handles it.
-        # For now, let's assume `update_post` returning False means "update did not happen for some reason".
-        # We will rely on the subsequent get_post to confirm the state.
-        pass # Or raise an HTTPException if update_post is expected to always succeed if post exists
-
-    updated_post_data = get_post(post_id)
-    if not updated_post_data:
-        # This would be unusual if the post existed and update_post didn't delete it
-        raise HTTPException(status_code=404, detail="Post not found after attempting update.")
-        
-    return PostResponse(**updated_post_data)
+async def update_existing_post(post_id: int, post_update: PostUpdate, current_user: UserInDB = Depends(auth.get_current_active_user)):
+    # Ownership is checked by the UPDATE itself. Posts without an owner (created before
+    # author_id existed) stay editable by any authenticated user, as they were before.
+    updated_post = update_post(post_id, author_id=current_user.id, title=post_update.title, content=post_update.content)
+
+    if not updated_post:
+        # Either the post is missing, owned by someone else, or the request had no fields to update.
+        # Only this failure path reads the post, to pick the right error.
+        existing_post = get_post(post_id)
+        if not existing_post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if existing_post["author_id"] not in (None, current_user.id):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        updated_post = existing_post  # Nothing to update: return the post as it is
+
+    return PostResponse(**updated_post)
 
 @app.delete("/posts/{post_id}", status_code=204)
-async def remove_post(post_id: int, current_user: User = Depends(auth.get_current_active_user)):
-    # Ownership logic is not implemented in this step.
-    # We just ensure the user is authenticated.
-    existing_post = get_post(post_id)
-    if not existing_post:
-        raise HTTPException(status_code=404, detail="Post not found")
-
-    deleted_successfully = delete_post(post_id)
+async def remove_post(post_id: int, current_user: UserInDB = Depends(auth.get_current_active_user)):
+    # Ownership is checked by the DELETE itself; unowned legacy posts can be deleted by anyone signed in
+    deleted_successfully = delete_post(post_id, author_id=current_user.id)
     
     if not deleted_successfully:
-        # This case implies the post existed (checked above) but deletion failed for some other reason.
-        # This could be a server error or an issue with the delete_post function's logic if it
-        # can return False even for existing posts (e.g., database constraints, though not in this simple schema).
-        raise HTTPException(status_code=500, detail="Failed to delete post.")
+        # Only this failure path reads the post, to tell "missing" from "not yours"
+        if not get_post(post_id):
+            raise HTTPException(status_code=404, detail="Post not found")
+        raise HTTPException(status_code=403, detail="Not enough permissions")
     
     # No content to return, status code 204 handles this.
     return
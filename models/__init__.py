@@ -1,4 +1,4 @@
-from .post import PostBase, PostCreate, PostUpdate, PostResponse
+from .post import PostBase, PostCreate, PostUpdate, PostResponse, PostPage
 from .user import User, UserBase, UserCreate, UserInDB, Token, TokenData
 
 # This makes it possible to import, for example, models.PostResponse
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 class PostBase(BaseModel):
@@ -13,3 +14,8 @@ class PostUpdate(PostBase):
 
 class PostResponse(PostBase):
     id: int
+    author_id: Optional[int] = None  # None for posts created before ownership was tracked
+
+class PostPage(BaseModel):
+    items: List[PostResponse]
+    next_cursor: Optional[int] = None  # Pass as ?cursor= to fetch the next page; None on the last page
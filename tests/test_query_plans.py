@@ -0,0 +1,172 @@
+import ast
+import inspect
+import json
+import sqlite3
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import query_plan, utils
+from database.setup import create_db_and_tables
+from models.user import UserCreate
+
+# Approved EXPLAIN QUERY PLAN output for every statement issued by database/utils.py.
+# After an intentional query or schema change, regenerate it with
+#   UPDATE_QUERY_PLANS=1 python -m pytest tests/test_query_plans.py
+# and review the diff. A full scan of a table in query_plan.LARGE_TABLES is only
+# accepted when the entry sets "allow_full_scan" with a reason.
+APPROVED_PLANS_PATH = os.path.join(os.path.dirname(__file__), "approved_query_plans.json")
+
+# database.utils functions that open a connection but are deliberately not run by
+# exercise_data_layer, mapped to the reason. Everything else must be exercised.
+EXEMPT_FROM_PLAN_CHECK = {}
+
+SEED_USERS = 500
+SEED_POSTS = 5000
+
+
+def seed_database(db_path):
+    """Creates the real schema and fills it with a representative amount of data."""
+    create_db_and_tables(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO users (username, hashed_password) VALUES (?, ?)",
+        [(f"seed_user_{i}", "not-a-real-hash") for i in range(SEED_USERS)],
+    )
+    conn.executemany(
+        "INSERT INTO posts (title, content, author_id) VALUES (?, ?, ?)",
+        [(f"Seed post {i}", "Seed content " * 20, i % SEED_USERS + 1) for i in range(SEED_POSTS)],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def exercise_data_layer():
+    """Calls every database.utils function, covering each distinct statement it can build."""
+    user = utils.create_user(UserCreate(username="plan_check_user", password="unused"), "hash")
+    utils.get_user_by_username("plan_check_user")
+    utils.get_user(user.id)
+
+    post_id = utils.create_post("Plan check", "Plan check content", author_id=user.id)
+    utils.get_post(post_id)
+    utils.get_all_posts()
+    utils.get_posts_by_author(1)
+    utils.get_posts_by_author(1, before_id=SEED_POSTS // 2)
+    utils.update_post(post_id, author_id=user.id, title="New title")
+    utils.update_post(post_id, author_id=user.id, content="New content")
+    utils.update_post(post_id, author_id=user.id, title="Both", content="Both")
+    utils.delete_post(post_id, author_id=user.id)
+
+
+@pytest.fixture
+def captured_plans(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "plans.db")
+    seed_database(db_path)
+    monkeypatch.setattr(utils, "DATABASE_URL", db_path)
+    query_plan.clear_captured_plans()
+    query_plan.enable_capture()
+    try:
+        exercise_data_layer()
+        yield query_plan.get_captured_plans()
+    finally:
+        query_plan.disable_capture()
+        query_plan.clear_captured_plans()
+
+
+def load_approved_plans():
+    with open(APPROVED_PLANS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_approved_plans(captured):
+    approved = load_approved_plans() if os.path.exists(APPROVED_PLANS_PATH) else {}
+    updated = {}
+    for sql, plan in sorted(captured.items()):
+        entry = {"plan": plan}
+        if sql in approved and "allow_full_scan" in approved[sql]:
+            entry["allow_full_scan"] = approved[sql]["allow_full_scan"]
+        updated[sql] = entry
+    with open(APPROVED_PLANS_PATH, "w", encoding="utf-8") as f:
+        json.dump(updated, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def data_layer_functions():
+    """Public functions in database.utils that call get_db_connection."""
+    tree = ast.parse(inspect.getsource(utils))
+    names = set()
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and not node.name.startswith("_") and node.name != "get_db_connection":
+            if any(
+                isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == "get_db_connection"
+                for call in ast.walk(node)
+            ):
+                names.add(node.name)
+    return names
+
+
+def exercised_functions():
+    """database.utils functions called (as utils.<name>) by exercise_data_layer."""
+    tree = ast.parse(inspect.getsource(exercise_data_layer))
+    return {
+        call.func.attr
+        for call in ast.walk(tree)
+        if isinstance(call, ast.Call)
+        and isinstance(call.func, ast.Attribute)
+        and isinstance(call.func.value, ast.Name)
+        and call.func.value.id == "utils"
+    }
+
+
+def test_every_data_layer_function_is_exercised():
+    db_functions = data_layer_functions()
+    unexercised = sorted(db_functions - exercised_functions() - set(EXEMPT_FROM_PLAN_CHECK))
+    assert not unexercised, (
+        f"database.utils functions whose queries are not plan-checked: {unexercised}. "
+        "Call them from exercise_data_layer (or add them to EXEMPT_FROM_PLAN_CHECK with a reason)."
+    )
+    stale_exemptions = sorted(set(EXEMPT_FROM_PLAN_CHECK) - db_functions)
+    assert not stale_exemptions, f"Exemptions for functions that no longer query the database: {stale_exemptions}"
+
+
+def test_query_plans_match_approved(captured_plans):
+    if os.environ.get("UPDATE_QUERY_PLANS") == "1":
+        write_approved_plans(captured_plans)
+    approved = load_approved_plans()
+
+    unapproved = sorted(set(captured_plans) - set(approved))
+    assert not unapproved, f"Statements without an approved query plan: {unapproved}"
+
+    stale = sorted(set(approved) - set(captured_plans))
+    assert not stale, f"Approved plans for statements no longer issued (or not exercised): {stale}"
+
+    changed = {
+        sql: {"approved": approved[sql]["plan"], "actual": plan}
+        for sql, plan in captured_plans.items()
+        if plan != approved[sql]["plan"]
+    }
+    assert not changed, f"Query plan regressions: {json.dumps(changed, indent=2)}"
+
+
+def test_no_unapproved_full_scans_on_large_tables(captured_plans):
+    approved = load_approved_plans()
+    scans = {
+        sql: query_plan.find_full_scans(plan)
+        for sql, plan in captured_plans.items()
+        if query_plan.find_full_scans(plan) and not approved.get(sql, {}).get("allow_full_scan")
+    }
+    assert not scans, f"Full scans of large tables: {scans}"
+
+
+def test_capture_is_off_by_default(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "plans.db")
+    create_db_and_tables(db_path)
+    monkeypatch.setattr(utils, "DATABASE_URL", db_path)
+    query_plan.clear_captured_plans()
+    assert not query_plan.is_capture_enabled()
+    utils.get_all_posts()
+    assert query_plan.get_captured_plans() == {}